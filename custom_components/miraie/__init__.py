@@ -7,7 +7,16 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
 
-from .const import DOMAIN
+from .const import (
+    CONF_TRACE,
+    CONF_TRACE_SAMPLE_RATE,
+    DEFAULT_TRACE_SAMPLE_RATE,
+    DOMAIN,
+)
+from .home import MirAIeHomeWatcher
+from .models import MirAIeData
+from .precool import MirAIePrecoolScheduler
+from .tracing import MirAIeTracer
 
 # For your initial PR, limit it to 1 platform.
 PLATFORMS: list[Platform] = [Platform.CLIMATE, Platform.SWITCH, Platform.SENSOR]
@@ -20,16 +29,42 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     async with MirAIeHub() as hub:
         broker = MirAIeBroker()
         await hub.init(entry.data["username"], entry.data["password"], broker)
-        hass.data[DOMAIN][entry.entry_id] = hub
+
+    tracer = MirAIeTracer(
+        entry.options.get(CONF_TRACE, False),
+        entry.options.get(CONF_TRACE_SAMPLE_RATE, DEFAULT_TRACE_SAMPLE_RATE),
+    )
+    tracer.async_attach(hub, broker)
+    scheduler = MirAIePrecoolScheduler(hass, entry.entry_id)
+    await scheduler.async_load()
+    entry.async_on_unload(scheduler.async_cancel_all)
+
+    hass.data[DOMAIN][entry.entry_id] = MirAIeData(hub, tracer, scheduler)
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
+    MirAIeHomeWatcher(hass, entry, hub, broker, tracer).async_start()
+
+    entry.async_on_unload(entry.add_update_listener(async_update_options))
+
     return True
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
-        hass.data[DOMAIN].pop(entry.entry_id)
+        data: MirAIeData = hass.data[DOMAIN].pop(entry.entry_id)
+        hub = data.hub
+        if hub.http and not hub.http.closed:
+            await hub.http.close()
 
     return unload_ok
+
+
+async def async_update_options(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Apply updated options without reloading the entry."""
+    data: MirAIeData = hass.data[DOMAIN][entry.entry_id]
+    data.tracer.enabled = entry.options.get(CONF_TRACE, False)
+    data.tracer.sample_rate = entry.options.get(
+        CONF_TRACE_SAMPLE_RATE, DEFAULT_TRACE_SAMPLE_RATE
+    )
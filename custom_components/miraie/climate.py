@@ -1,6 +1,7 @@
 """The MirAIe climate platform."""
 
 from __future__ import annotations
+from datetime import datetime
 from typing import Any
 from miraie_ac import (
     Device as MirAIeDevice,
@@ -29,13 +30,20 @@ from homeassistant.components.climate import (
     PRECISION_WHOLE,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import UnitOfTemperature
-from homeassistant.core import HomeAssistant
+from homeassistant.const import ATTR_TEMPERATURE, UnitOfTemperature
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import config_validation as cv, entity_platform
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.util import dt as dt_util
+import voluptuous as vol
 
 from .const import (
+    ATTR_TARGET_TIME,
     DOMAIN,
+    SERVICE_PRECOOL,
+    SIGNAL_DEVICES_ADDED,
     V0,
     V1,
     V2,
@@ -60,23 +68,57 @@ from .const import (
 )
 
 from .logger import LOGGER
+from .models import MirAIeData
+from .precool import MirAIePrecoolScheduler
 
 async def async_setup_entry(
     hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
 ) -> None:
 
     """Set up the MirAIe Climate Hub."""
-    hub: MirAIeHub = hass.data[DOMAIN][entry.entry_id]
+    data: MirAIeData = hass.data[DOMAIN][entry.entry_id]
+    hub: MirAIeHub = data.hub
 
-    entities = list(map(MirAIeClimate, hub.home.devices))
+    entities = [
+        MirAIeClimate(device, data.scheduler)
+        for device in hub.home.devices
+    ]
 
     async_add_entities(entities)
 
+    @callback
+    def async_add_devices(devices: list[MirAIeDevice]) -> None:
+        async_add_entities(
+            [MirAIeClimate(device, data.scheduler) for device in devices]
+        )
+
+    entry.async_on_unload(
+        async_dispatcher_connect(
+            hass, SIGNAL_DEVICES_ADDED.format(entry.entry_id), async_add_devices
+        )
+    )
+
+    platform = entity_platform.async_get_current_platform()
+    platform.async_register_entity_service(
+        SERVICE_PRECOOL,
+        {
+            vol.Required(ATTR_TARGET_TIME): cv.datetime,
+            vol.Required(ATTR_TEMPERATURE): vol.All(
+                vol.Coerce(float), vol.Range(min=16, max=30)
+            ),
+        },
+        "async_precool",
+    )
+
 
 class MirAIeClimate(ClimateEntity):
     """Representation of a MirAIe Climate."""
 
-    def __init__(self, device: MirAIeDevice) -> None:
+    def __init__(
+        self,
+        device: MirAIeDevice,
+        scheduler: MirAIePrecoolScheduler,
+    ) -> None:
         
         self._attr_should_poll: bool = False
         self._attr_has_entity_name: bool = True
@@ -117,6 +159,7 @@ class MirAIeClimate(ClimateEntity):
         self._attr_precision = PRECISION_WHOLE
         self._attr_unique_id = device.id
         self.device = device
+        self.scheduler = scheduler
 
     @property
     def name(self) -> str:
@@ -233,13 +276,13 @@ class MirAIeClimate(ClimateEntity):
 
     async def async_set_temperature(self, **kwargs: Any) -> None:
         
-        LOGGER.debug(f"Set temperature to {kwargs["temperature"]}")
+        LOGGER.debug("Set temperature to %s", kwargs["temperature"])
         
         await self.device.set_temperature(kwargs["temperature"])
 
     async def async_set_hvac_mode(self, hvac_mode: HVACMode) -> None:
         
-        LOGGER.debug(f"Set hvac mode to {hvac_mode}")
+        LOGGER.debug("Set hvac mode to %s", hvac_mode)
         
         if hvac_mode == HVACMode.OFF:
             await self.device.turn_off()
@@ -255,7 +298,7 @@ class MirAIeClimate(ClimateEntity):
 
     async def async_set_fan_mode(self, fan_mode: str) -> None:
         
-        LOGGER.debug(f"Set fan mode to {fan_mode}")
+        LOGGER.debug("Set fan mode to %s", fan_mode)
         
         if fan_mode == FAN_OFF:
             await self.device.set_fan_mode(FanMode("quiet"))
@@ -263,7 +306,7 @@ class MirAIeClimate(ClimateEntity):
             await self.device.set_fan_mode(FanMode(fan_mode))
 
     async def async_set_swing_mode(self, swing_mode: str) -> None:
-        LOGGER.debug(f"Set swing vertical mode to {swing_mode}")
+        LOGGER.debug("Set swing vertical mode to %s", swing_mode)
         if swing_mode == V1:
             await self.device.set_v_swing_mode(SwingMode(1))
         elif swing_mode == V2:
@@ -278,7 +321,7 @@ class MirAIeClimate(ClimateEntity):
             await self.device.set_v_swing_mode(SwingMode(0))
             
     async def async_set_swing_horizontal_mode(self, swing_mode: str) -> None:
-        LOGGER.debug(f"Set swing horizontal mode to {swing_mode}")    
+        LOGGER.debug("Set swing horizontal mode to %s", swing_mode)
         if swing_mode == H1:
             await self.device.set_h_swing_mode(SwingMode(1))
         elif swing_mode == H2:
@@ -294,7 +337,7 @@ class MirAIeClimate(ClimateEntity):
 
     async def async_set_preset_mode(self, preset_mode: str) -> None:
         
-        LOGGER.debug(f"Set preset mode to {preset_mode}")
+        LOGGER.debug("Set preset mode to %s", preset_mode)
         
         if preset_mode.startswith("cv"):
             preset_mode = int(preset_mode.split(" ")[1])
@@ -302,13 +345,35 @@ class MirAIeClimate(ClimateEntity):
         else:
             await self.device.set_preset_mode(PresetMode(preset_mode))
 
+    @callback
+    def _async_handle_update(self) -> None:
+        """Write the device status pushed over MQTT to HA."""
+        self.scheduler.async_record(self.device)
+        self.async_write_ha_state()
+
+    async def async_precool(self, target_time: datetime, temperature: float) -> None:
+        """Cool the room down to temperature by target_time."""
+        if target_time.tzinfo is None:
+            target_time = target_time.replace(tzinfo=dt_util.get_default_time_zone())
+
+        LOGGER.debug("Pre-cool to %s by %s", temperature, target_time)
+
+        self.scheduler.async_schedule(
+            self.device, target_time, temperature, self._async_start_precool
+        )
+
+    async def _async_start_precool(self, temperature: float) -> None:
+        """Start cooling towards a pre-cooling target."""
+        await self.async_set_hvac_mode(HVACMode.COOL)
+        await self.async_set_temperature(temperature=temperature)
+
     async def async_added_to_hass(self) -> None:
         """Run when this Entity has been added to HA."""
         
         LOGGER.debug("Successfully added to HA")
         
         # Sensors should also register callbacks to HA when their state changes
-        self.device.register_callback(self.async_write_ha_state)
+        self.device.register_callback(self._async_handle_update)
 
     async def async_will_remove_from_hass(self) -> None:
         """Entity being removed from hass."""
@@ -316,4 +381,5 @@ class MirAIeClimate(ClimateEntity):
         LOGGER.debug("Successfully removed from HA")
         
         # The opposite of async_added_to_hass. Remove any registered call backs here.
-        self.device.remove_callback(self.async_write_ha_state)
+        self.device.remove_callback(self._async_handle_update)
+        self.scheduler.async_cancel(self.device)
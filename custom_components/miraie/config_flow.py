@@ -8,11 +8,16 @@ from miraie_ac import MirAIeHub
 import voluptuous as vol
 
 from homeassistant import config_entries
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.exceptions import HomeAssistantError
 
-from .const import DOMAIN
+from .const import (
+    CONF_TRACE,
+    CONF_TRACE_SAMPLE_RATE,
+    DEFAULT_TRACE_SAMPLE_RATE,
+    DOMAIN,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -50,6 +55,14 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
     VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> OptionsFlowHandler:
+        """Get the options flow for this handler."""
+        return OptionsFlowHandler()
+
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
@@ -78,6 +91,35 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         )
 
 
+class OptionsFlowHandler(config_entries.OptionsFlow):
+    """Handle the mirAIe options."""
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Manage the traffic tracing options."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        options = self.config_entry.options
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(
+                        CONF_TRACE, default=options.get(CONF_TRACE, False)
+                    ): bool,
+                    vol.Required(
+                        CONF_TRACE_SAMPLE_RATE,
+                        default=options.get(
+                            CONF_TRACE_SAMPLE_RATE, DEFAULT_TRACE_SAMPLE_RATE
+                        ),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0.01, max=1.0)),
+                }
+            ),
+        )
+
+
 class CannotConnect(HomeAssistantError):
     """Error to indicate we cannot connect."""
 
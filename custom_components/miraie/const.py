@@ -1,5 +1,7 @@
 """Constants for the mirAIe integration."""
 
+from datetime import timedelta
+
 DOMAIN = "miraie"
 PACKAGE_NAME = "custom_components.miraie"
 
@@ -29,4 +31,20 @@ PRESET_CONVERTI_C80 = "cv 80"
 PRESET_CONVERTI_C70 = "cv 70"
 PRESET_CONVERTI_C55 = "cv 55"
 PRESET_CONVERTI_C40 = "cv 40"
-PRESET_CONVERTI_C0 = "cv 0"
\ No newline at end of file
+PRESET_CONVERTI_C0 = "cv 0"
+
+# How often the home is checked for added or removed devices
+HOME_REFRESH_INTERVAL = timedelta(minutes=15)
+
+# Dispatcher signal sent with the newly added devices of a config entry
+SIGNAL_DEVICES_ADDED = f"{DOMAIN}_devices_added_{{}}"
+
+# Traffic tracing options
+CONF_TRACE = "trace"
+CONF_TRACE_SAMPLE_RATE = "trace_sample_rate"
+DEFAULT_TRACE_SAMPLE_RATE = 1.0
+TRACE_BUFFER_SIZE = 500
+
+# Pre-cooling service
+SERVICE_PRECOOL = "precool"
+ATTR_TARGET_TIME = "target_time"
@@ -0,0 +1,30 @@
+"""Diagnostics support for mirAIe."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+from .models import MirAIeData
+
+TO_REDACT = {"username", "password"}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    data: MirAIeData = hass.data[DOMAIN][entry.entry_id]
+
+    return {
+        "entry": {
+            "data": async_redact_data(entry.data, TO_REDACT),
+            "options": dict(entry.options),
+        },
+        "devices": [device.id for device in data.hub.home.devices],
+        "trace": data.tracer.as_diagnostics(),
+    }
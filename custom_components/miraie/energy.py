@@ -0,0 +1,162 @@
+"""Running energy totals across MirAIe devices."""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import date
+
+from miraie_ac import ConsumptionPeriodType
+
+from homeassistant.core import CALLBACK_TYPE, callback
+
+# Group key of the account wide totals, areas are keyed by their area_id
+ACCOUNT = None
+
+
+@dataclass
+class EnergyTotal:
+    """Sum of the device consumptions reported for a single period."""
+
+    period_start: date
+    total: float = 0.0
+    values: dict[str, float] = field(default_factory=dict)
+
+    def update(self, device_id: str, period_start: date, value: float) -> bool:
+        """Apply a device value, return True if the total changed."""
+        if period_start < self.period_start:
+            return False
+
+        if period_start > self.period_start:
+            # A new period started, values of the previous one no longer count
+            self.period_start = period_start
+            self.total = 0.0
+            self.values.clear()
+
+        previous = self.values.get(device_id)
+        if previous == value:
+            return False
+
+        self.total += value - (previous or 0.0)
+        self.values[device_id] = value
+        return True
+
+    def remove(self, device_id: str) -> bool:
+        """Drop a device value, return True if the total changed."""
+        if (previous := self.values.pop(device_id, None)) is None:
+            return False
+
+        self.total = self.total - previous if self.values else 0.0
+        return True
+
+
+class MirAIeEnergyAggregator:
+    """Keeps per account and per area totals of each consumption period.
+
+    Totals are adjusted by the difference of each device value as it is
+    fetched, so members are never summed again.
+    """
+
+    def __init__(self) -> None:
+        self._totals: dict[tuple[str | None, ConsumptionPeriodType], EnergyTotal] = {}
+        self._device_areas: dict[str, str | None] = {}
+        self._areas: set[str] = set()
+        self._listeners: dict[
+            tuple[str | None, ConsumptionPeriodType], list[CALLBACK_TYPE]
+        ] = {}
+        self._area_listeners: list[Callable[[str], None]] = []
+
+    def get(
+        self, area_id: str | None, period_type: ConsumptionPeriodType
+    ) -> EnergyTotal | None:
+        """Return the total of an area, or of the account if area_id is None."""
+        return self._totals.get((area_id, period_type))
+
+    @callback
+    def async_update(
+        self,
+        device_id: str,
+        area_id: str | None,
+        period_type: ConsumptionPeriodType,
+        period_start: date,
+        value: float,
+        notify: bool = True,
+    ) -> None:
+        """Apply the consumption fetched for a device.
+
+        Restored values are applied with notify False, so listeners only see
+        totals once live values start to arrive.
+        """
+        if (previous_area := self._device_areas.get(device_id)) != area_id:
+            # The device moved, take its values out of the previous area
+            if previous_area is not None:
+                for (group, group_period), total in self._totals.items():
+                    if group == previous_area and total.remove(device_id):
+                        self._async_notify(group, group_period)
+            self._device_areas[device_id] = area_id
+
+        if area_id is not None and area_id not in self._areas:
+            self._areas.add(area_id)
+            for area_callback in self._area_listeners:
+                area_callback(area_id)
+
+        groups = [ACCOUNT] if area_id is None else [ACCOUNT, area_id]
+        for group in groups:
+            key = (group, period_type)
+            if (total := self._totals.get(key)) is None:
+                total = self._totals[key] = EnergyTotal(period_start)
+            if total.update(device_id, period_start, value) and notify:
+                self._async_notify(group, period_type)
+
+    @callback
+    def async_remove_device(
+        self, device_id: str, period_type: ConsumptionPeriodType | None = None
+    ) -> None:
+        """Take a device out of the totals of period_type, or of every period."""
+        if period_type is None:
+            self._device_areas.pop(device_id, None)
+        for (group, group_period), total in self._totals.items():
+            if period_type in (None, group_period) and total.remove(device_id):
+                self._async_notify(group, group_period)
+
+    @callback
+    def async_add_listener(
+        self,
+        area_id: str | None,
+        period_type: ConsumptionPeriodType,
+        update_callback: CALLBACK_TYPE,
+    ) -> CALLBACK_TYPE:
+        """Listen for changes of a total."""
+        listeners = self._listeners.setdefault((area_id, period_type), [])
+        listeners.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            listeners.remove(update_callback)
+
+        return remove_listener
+
+    @callback
+    def async_add_area(self, area_id: str) -> None:
+        """Mark an area as known, so it is not announced to area listeners."""
+        self._areas.add(area_id)
+
+    @callback
+    def async_add_area_listener(
+        self, area_callback: Callable[[str], None]
+    ) -> CALLBACK_TYPE:
+        """Listen for areas that get their first total."""
+        self._area_listeners.append(area_callback)
+
+        @callback
+        def remove_listener() -> None:
+            self._area_listeners.remove(area_callback)
+
+        return remove_listener
+
+    @callback
+    def _async_notify(
+        self, area_id: str | None, period_type: ConsumptionPeriodType
+    ) -> None:
+        for update_callback in self._listeners.get((area_id, period_type), []):
+            update_callback()
@@ -0,0 +1,300 @@
+"""Keeps the MirAIe home in sync with the devices known to Home Assistant."""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime
+from typing import Any
+
+from aiomqtt import Message, MqttError
+from miraie_ac import (
+    ConvertiMode,
+    Device as MirAIeDevice,
+    DisplayMode,
+    FanMode,
+    HVACMode,
+    MirAIeBroker,
+    MirAIeHub,
+    PowerMode,
+    PresetMode,
+    SwingMode,
+    constants,
+)
+from miraie_ac.device import DeviceDetails, DeviceStatus
+from miraie_ac.topic import MirAIeTopic
+from miraie_ac.utils import toFloat
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import async_track_time_interval
+
+from .const import DOMAIN, HOME_REFRESH_INTERVAL, SIGNAL_DEVICES_ADDED
+from .logger import LOGGER
+from .tracing import MirAIeTracer
+
+
+class MirAIeHomeWatcher:
+    """Periodically diffs the device IDs of the MirAIe home.
+
+    Only the home details are fetched and compared by device ID. Devices
+    that are still present keep their existing objects, so live entities
+    and subscriptions are left untouched.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        hub: MirAIeHub,
+        broker: MirAIeBroker,
+        tracer: MirAIeTracer,
+    ) -> None:
+        self.hass = hass
+        self.entry = entry
+        self.hub = hub
+        self.broker = broker
+        self.tracer = tracer
+        self._lock = asyncio.Lock()
+        # Removed devices are kept referenced, as Device.__del__ drops the
+        # handlers of their topics, which a device added later may reuse
+        self._removed: list[MirAIeDevice] = []
+        # IDs of known devices the last refresh did not return
+        self._missing: set[str] = set()
+
+    @callback
+    def async_start(self) -> None:
+        """Schedule the periodic home refresh for the lifetime of the entry."""
+        # Messages of a removed device may still be queued when its handlers
+        # are gone, the broker would fail on them and stop receiving
+        on_message = self.broker.on_message
+
+        def guarded_on_message(message: Message) -> None:
+            if message.topic.value not in self.broker.status_callbacks:
+                LOGGER.debug("Dropping message for unknown topic %s", message.topic)
+                return
+            on_message(message)
+
+        self.broker.on_message = guarded_on_message
+
+        self.entry.async_on_unload(
+            async_track_time_interval(
+                self.hass, self.async_refresh, HOME_REFRESH_INTERVAL
+            )
+        )
+
+    async def async_refresh(self, now: datetime | None = None) -> None:
+        """Add devices that are new to the home and remove the ones that are gone."""
+        if self._lock.locked():
+            return
+
+        async with self._lock:
+            if not self.hub.http or self.hub.http.closed:
+                self.hub.http = self.tracer.client_session()
+
+            try:
+                home_details = await self._async_fetch_home_details()
+                raw_devices = {
+                    device["deviceId"]: device
+                    for space in home_details["spaces"]
+                    for device in space["devices"]
+                }
+            except Exception as exc:  # pylint: disable=broad-except
+                LOGGER.warning("Unable to refresh the MirAIe home: %s", exc)
+                return
+
+            if not raw_devices:
+                LOGGER.warning("The MirAIe home has no devices, keeping the known ones")
+                return
+
+            # A device is only removed once it is missing from two refreshes in
+            # a row, so a single partial response doesn't wipe its entities
+            known = {device.id: device for device in self.hub.home.devices}
+            missing = known.keys() - raw_devices.keys()
+            for device_id in missing & self._missing:
+                await self._async_remove_device(known.pop(device_id))
+            self._missing = missing & known.keys()
+
+            if not raw_devices.keys() - known.keys():
+                return
+
+            # Only the new devices are built, so the handlers of live devices
+            # registered with the broker are left alone
+            new_devices = [
+                device
+                for device_id, device in raw_devices.items()
+                if device_id not in known
+            ]
+            try:
+                added = await self._async_create_devices(new_devices)
+            except Exception as exc:  # pylint: disable=broad-except
+                LOGGER.warning("Unable to set up the new MirAIe devices: %s", exc)
+                return
+
+            for device in added:
+                await self._async_add_device(device)
+
+            async_dispatcher_send(
+                self.hass, SIGNAL_DEVICES_ADDED.format(self.entry.entry_id), added
+            )
+
+    async def _async_fetch_home_details(self) -> dict[str, Any]:
+        """Fetch the raw home details without touching the hub's home."""
+        # pylint: disable=protected-access
+        response = await self.hub.http.get(
+            constants.homesUrl, headers=self.hub.__build_headers__()
+        )
+        if response.status == 401:
+            # The access token expired, get_token authenticates again
+            await self.hub.get_token()
+            response = await self.hub.http.get(
+                constants.homesUrl, headers=self.hub.__build_headers__()
+            )
+        response.raise_for_status()
+        return (await response.json())[0]
+
+    async def _async_create_devices(
+        self, raw_devices: list[dict[str, Any]]
+    ) -> list[MirAIeDevice]:
+        """Build devices from their home details along with their details and status.
+
+        The devices are built the way the hub builds them, but without
+        touching hub.home, which the entities read while this is awaited.
+        """
+        devices: list[MirAIeDevice] = []
+        for raw_device in raw_devices:
+            topic = str(raw_device["topic"][0])
+            devices.append(
+                MirAIeDevice(
+                    id=raw_device["deviceId"],
+                    name=str(raw_device["deviceName"]).lower().replace(" ", "-"),
+                    friendly_name=raw_device["deviceName"],
+                    control_topic=f"{topic}/control",
+                    status_topic=f"{topic}/status",
+                    connection_status_topic=f"{topic}/connectionStatus",
+                    broker=self.broker,
+                )
+            )
+
+        # pylint: disable=protected-access
+        device_details = await self.hub._get_device_details(
+            ",".join(device.id for device in devices)
+        )
+        statuses = await asyncio.gather(
+            *(self.hub._get_device_status(device.id) for device in devices)
+        )
+
+        details_by_id = {details["deviceId"]: details for details in device_details}
+        for device, status in zip(devices, statuses):
+            details = details_by_id[device.id]
+            device.set_details(
+                DeviceDetails(
+                    model_name=details["modelName"],
+                    mac_address=details["macAddress"],
+                    category=details["category"],
+                    brand=details["brand"],
+                    firmware_version=details["firmwareVersion"],
+                    serial_number=details["serialNumber"],
+                    model_number=details["modelNumber"],
+                    product_serial_number=details["productSerialNumber"],
+                )
+            )
+            device.set_status(_device_status(status))
+
+        return devices
+
+    async def _async_add_device(self, device: MirAIeDevice) -> None:
+        """Subscribe to a new device and make it part of the hub's home."""
+        LOGGER.debug("Adding device %s to the MirAIe home", device.id)
+        self.hub.topics_map[device.id] = MirAIeTopic(
+            control_topic=device.control_topic,
+            status_topic=device.status_topic,
+            connection_status_topic=device.connection_status_topic,
+        )
+
+        # The device registered its handlers with the broker when it was built.
+        # Its topics are added to the broker's topics, so they are subscribed
+        # to again on every reconnect.
+        topics = _device_topics(device)
+        self.broker.commandTopics.extend(topics)
+        if (client := getattr(self.broker, "client", None)) is not None:
+            try:
+                for topic in topics:
+                    await client.subscribe(topic)
+            except MqttError as exc:
+                LOGGER.debug("Subscribing on the next reconnect: %s", exc)
+
+        self.hub.home.devices.append(device)
+
+    async def _async_remove_device(self, device: MirAIeDevice) -> None:
+        """Unsubscribe from a device and remove its entities from HA."""
+        LOGGER.debug("Removing device %s from the MirAIe home", device.id)
+
+        self.hub.home.devices.remove(device)
+        self.hub.topics_map.pop(device.id, None)
+        self._removed.append(device)
+
+        topics = _device_topics(device)
+        for topic in topics:
+            if topic in self.broker.commandTopics:
+                self.broker.commandTopics.remove(topic)
+        if (client := getattr(self.broker, "client", None)) is not None:
+            try:
+                for topic in topics:
+                    await client.unsubscribe(topic)
+            except MqttError as exc:
+                LOGGER.debug("Unable to unsubscribe from %s: %s", device.id, exc)
+        for topic in topics:
+            self.broker.remove_device_callback(topic)
+
+        # Detaching the config entry removes the device's entities, which in
+        # turn unregister their device callbacks in async_will_remove_from_hass.
+        device_registry = dr.async_get(self.hass)
+        if device_entry := device_registry.async_get_device(
+            identifiers={(DOMAIN, device.id)}
+        ):
+            device_registry.async_update_device(
+                device_entry.id, remove_config_entry_id=self.entry.entry_id
+            )
+
+
+def _device_topics(device: MirAIeDevice) -> list[str]:
+    """Return the MQTT topics a device receives its updates on."""
+    return [device.status_topic, device.connection_status_topic]
+
+
+def _device_status(status: dict[str, Any]) -> DeviceStatus:
+    """Parse a fetched device status the way MirAIeHub.get_all_device_status does."""
+    if status.get("ty") != "AC":
+        return DeviceStatus(
+            is_online=False,
+            temperature=24.0,
+            room_temperature=24.0,
+            power_mode=PowerMode.OFF,
+            fan_mode=FanMode.AUTO,
+            v_swing_mode=SwingMode.AUTO,
+            h_swing_mode=SwingMode.AUTO,
+            display_mode=DisplayMode.ON,
+            hvac_mode=HVACMode.AUTO,
+            preset_mode=PresetMode.NONE,
+            converti_mode=ConvertiMode.OFF,
+        )
+
+    return DeviceStatus(
+        is_online=status["onlineStatus"] == "true",
+        temperature=toFloat(status["actmp"]),
+        room_temperature=toFloat(status["rmtmp"]),
+        power_mode=PowerMode(status["ps"]),
+        fan_mode=FanMode(status["acfs"]),
+        v_swing_mode=SwingMode(status["acvs"]),
+        h_swing_mode=SwingMode(status["achs"]),
+        display_mode=DisplayMode(status["acdc"]),
+        hvac_mode=HVACMode(status["acmd"]),
+        preset_mode=PresetMode.BOOST
+        if status["acpm"] == "on"
+        else PresetMode.ECO
+        if status["acem"] == "on"
+        else PresetMode.NONE,
+        converti_mode=ConvertiMode(status.get("cnv", 0)),
+    )
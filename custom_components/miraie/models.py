@@ -0,0 +1,21 @@
+"""Runtime data of the mirAIe integration."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+from miraie_ac import MirAIeHub
+
+from .energy import MirAIeEnergyAggregator
+from .precool import MirAIePrecoolScheduler
+from .tracing import MirAIeTracer
+
+
+@dataclass
+class MirAIeData:
+    """Data stored for each mirAIe config entry."""
+
+    hub: MirAIeHub
+    tracer: MirAIeTracer
+    scheduler: MirAIePrecoolScheduler
+    energy: MirAIeEnergyAggregator = field(default_factory=MirAIeEnergyAggregator)
@@ -0,0 +1,263 @@
+"""Predictive pre-cooling of MirAIe devices."""
+
+from __future__ import annotations
+
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+import time
+
+from miraie_ac import Device as MirAIeDevice
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers.event import async_track_point_in_time
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+from .logger import LOGGER
+
+STORAGE_VERSION = 1
+SAVE_DELAY = 60
+
+# Cool-down rate in °C per minute used until a device has been observed
+DEFAULT_COOLING_RATE = 0.1
+MIN_COOLING_RATE = 0.01
+# Weight of a new sample once a device has more than 1 / RATE_SMOOTHING samples
+RATE_SMOOTHING = 0.2
+# Drops further apart than this are not part of a continuous cool-down
+MAX_SAMPLE_GAP = 30 * 60
+
+PRECOOL_MARGIN = timedelta(minutes=5)
+MAX_PRECOOL_LEAD = timedelta(hours=3)
+# Minimum time between the starts of two devices, to limit the peak load
+PRECOOL_STAGGER = timedelta(minutes=2)
+
+
+@dataclass
+class CoolingStats:
+    """Rolling average of the rate a device cools its room down at."""
+
+    rate: float = DEFAULT_COOLING_RATE
+    samples: int = 0
+
+    def add(self, rate: float) -> None:
+        """Fold a new rate sample into the average."""
+        self.samples += 1
+        weight = max(1 / self.samples, RATE_SMOOTHING)
+        self.rate += (rate - self.rate) * weight
+
+
+@dataclass
+class PrecoolPlan:
+    """A pending request to reach a temperature by a given time."""
+
+    device: MirAIeDevice
+    target_time: datetime
+    temperature: float
+    start: Callable[[float], Awaitable[None]]
+    start_time: datetime | None = None
+    cancel: CALLBACK_TYPE | None = None
+    # Room temperature the start time was worked out from
+    room_temperature: float | None = None
+    # How late the start was when last warned about
+    warned_delay: timedelta = timedelta()
+
+
+class MirAIePrecoolScheduler:
+    """Starts devices at the latest point that still reaches the target.
+
+    The cool-down rate of each device is learned from the room temperature
+    pushed over MQTT while it is cooling. Starts of different devices are
+    spread out by PRECOOL_STAGGER, and are worked out again whenever a
+    device with a pending start reports a new room temperature.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        self.hass = hass
+        self._store: Store[dict[str, list[float]]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.cooling_stats"
+        )
+        self._stats: dict[str, CoolingStats] = {}
+        # Time and room temperature of the last change seen while cooling
+        self._last_samples: dict[str, tuple[float, float]] = {}
+        self._plans: dict[str, PrecoolPlan] = {}
+
+    async def async_load(self) -> None:
+        """Load the learned cooling rates."""
+        if (data := await self._store.async_load()) is not None:
+            self._stats = {
+                device_id: CoolingStats(rate, int(samples))
+                for device_id, (rate, samples) in data.items()
+            }
+
+    @callback
+    def async_record(self, device: MirAIeDevice) -> None:
+        """Learn from a status update of a device and replan its pending start."""
+        self._async_learn(device)
+
+        # Replanned after learning, so the new start uses the updated rate
+        if (
+            plan := self._plans.get(device.id)
+        ) is not None and plan.room_temperature != device.status.room_temperature:
+            self._async_reschedule()
+
+    @callback
+    def _async_learn(self, device: MirAIeDevice) -> None:
+        """Fold the room temperature drop of a cooling device into its rate."""
+        status = device.status
+        room_temperature = status.room_temperature
+
+        if (
+            status.power_mode.value != "on"
+            or status.hvac_mode.value != "cool"
+            or room_temperature is None
+            or status.temperature is None
+            or room_temperature <= status.temperature
+        ):
+            self._last_samples.pop(device.id, None)
+            return
+
+        now = time.monotonic()
+        if (last_sample := self._last_samples.get(device.id)) is not None:
+            last_time, last_temperature = last_sample
+            if room_temperature == last_temperature:
+                return
+            if room_temperature < last_temperature and now - last_time <= MAX_SAMPLE_GAP:
+                rate = (last_temperature - room_temperature) / ((now - last_time) / 60)
+                self._stats.setdefault(device.id, CoolingStats()).add(rate)
+                self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+        self._last_samples[device.id] = (now, room_temperature)
+
+    @callback
+    def async_schedule(
+        self,
+        device: MirAIeDevice,
+        target_time: datetime,
+        temperature: float,
+        start: Callable[[float], Awaitable[None]],
+    ) -> None:
+        """Plan for a device to reach temperature by target_time."""
+        if target_time <= dt_util.utcnow():
+            raise ServiceValidationError(
+                f"The pre-cooling target time {target_time} has already passed"
+            )
+
+        self.async_cancel(device)
+        self._plans[device.id] = PrecoolPlan(device, target_time, temperature, start)
+        self._async_reschedule()
+
+    @callback
+    def async_cancel(self, device: MirAIeDevice) -> None:
+        """Cancel the pending start of a device."""
+        if (plan := self._plans.pop(device.id, None)) is not None and plan.cancel:
+            plan.cancel()
+
+    @callback
+    def async_cancel_all(self) -> None:
+        """Cancel every pending start."""
+        for plan in self._plans.values():
+            if plan.cancel:
+                plan.cancel()
+        self._plans.clear()
+
+    def lead_time(self, device: MirAIeDevice, temperature: float) -> timedelta:
+        """Return how long a device needs to cool its room to temperature."""
+        room_temperature = device.status.room_temperature
+        if room_temperature is None or room_temperature <= temperature:
+            return PRECOOL_MARGIN
+
+        stats = self._stats.get(device.id, CoolingStats())
+        minutes = (room_temperature - temperature) / max(stats.rate, MIN_COOLING_RATE)
+        return timedelta(minutes=minutes) + PRECOOL_MARGIN
+
+    @callback
+    def _async_reschedule(self) -> None:
+        """Work out the start of every pending plan and (re)arm the timers."""
+        now = dt_util.utcnow()
+        # Starts that reach the target, and the ones planned with the lead
+        # capped at MAX_PRECOOL_LEAD
+        needed_starts = {
+            plan.device.id: plan.target_time
+            - self.lead_time(plan.device, plan.temperature)
+            for plan in self._plans.values()
+        }
+        latest_starts = {
+            plan.device.id: max(
+                needed_starts[plan.device.id], plan.target_time - MAX_PRECOOL_LEAD
+            )
+            for plan in self._plans.values()
+        }
+
+        # Latest possible starts, moved earlier where they are too close
+        plans = sorted(
+            self._plans.values(),
+            key=lambda plan: latest_starts[plan.device.id],
+            reverse=True,
+        )
+        previous: datetime | None = None
+        for plan in plans:
+            start_time = latest_starts[plan.device.id]
+            if previous is not None:
+                start_time = min(start_time, previous - PRECOOL_STAGGER)
+            plan.start_time = previous = start_time
+
+        # Starts that are already due can only be spread out from now on,
+        # which may be too late to reach the target
+        previous = None
+        for plan in reversed(plans):
+            start_time = max(plan.start_time, now)
+            if previous is not None:
+                start_time = max(start_time, previous + PRECOOL_STAGGER)
+            plan.start_time = previous = start_time
+            plan.room_temperature = plan.device.status.room_temperature
+
+            if (delay := start_time - needed_starts[plan.device.id]) > plan.warned_delay:
+                plan.warned_delay = delay
+                LOGGER.warning(
+                    "Pre-cooling of %s starts at %s, %s after the latest start "
+                    "that reaches %s°C by %s",
+                    plan.device.friendly_name,
+                    start_time,
+                    delay,
+                    plan.temperature,
+                    plan.target_time,
+                )
+
+        for plan in plans:
+            if plan.cancel:
+                plan.cancel()
+            LOGGER.debug(
+                "Pre-cooling %s to %s at %s, starting at %s",
+                plan.device.id,
+                plan.temperature,
+                plan.target_time,
+                plan.start_time,
+            )
+            plan.cancel = async_track_point_in_time(
+                self.hass, self._start_action(plan), plan.start_time
+            )
+
+    def _start_action(
+        self, plan: PrecoolPlan
+    ) -> Callable[[datetime], Awaitable[None]]:
+        """Return the action that starts the device of a plan."""
+
+        async def async_start(now: datetime) -> None:
+            if self._plans.get(plan.device.id) is not plan:
+                return
+            del self._plans[plan.device.id]
+            LOGGER.debug("Starting pre-cooling of %s", plan.device.id)
+            await plan.start(plan.temperature)
+
+        return async_start
+
+    @callback
+    def _data_to_save(self) -> dict[str, list[float]]:
+        """Return the learned cooling rates to store."""
+        return {
+            device_id: [stats.rate, stats.samples]
+            for device_id, stats in self._stats.items()
+        }
@@ -1,35 +1,52 @@
 from abc import ABC, abstractmethod
-from datetime import datetime, timezone, timedelta
+from datetime import date, datetime, timezone, timedelta
 
-import aiohttp
 from miraie_ac import Device as MirAIeDevice, MirAIeHub, ConsumptionPeriodType
 
-from homeassistant.components.sensor import SensorDeviceClass, SensorEntity, SensorStateClass
+from homeassistant.components.sensor import RestoreSensor, SensorDeviceClass, SensorStateClass
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import UnitOfEnergy
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import area_registry as ar, device_registry as dr
 from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.event import async_call_later, async_track_time_interval
+from homeassistant.util import dt as dt_util
 
-from .const import DOMAIN
+from .const import DOMAIN, SIGNAL_DEVICES_ADDED
+from .energy import ACCOUNT, MirAIeEnergyAggregator
 from .logger import LOGGER
+from .models import MirAIeData
+from .tracing import MirAIeTracer
 from .utils import get_last_sunday
 
 
 CUTOFF_HOUR = 12
+ATTR_PERIOD_START = "period_start"
+UPDATE_INTERVAL = timedelta(minutes=30)
+# Delay before the first fetch, so setup never waits on the cloud
+FIRST_UPDATE_DELAY = timedelta(seconds=30)
 
-class MirAIeEnergySensor(SensorEntity, ABC):
+class MirAIeEnergySensor(RestoreSensor, ABC):
     """Sensor for AC Power Consumption."""
     @property
     @abstractmethod
     def period_type(self) -> ConsumptionPeriodType:
         return None
 
-    def __init__(self, hub: MirAIeHub, device: MirAIeDevice):
+    def __init__(
+        self,
+        hub: MirAIeHub,
+        device: MirAIeDevice,
+        tracer: MirAIeTracer,
+        aggregator: MirAIeEnergyAggregator,
+    ):
         """Initialize the sensor."""
         self.hub = hub
         self.device = device
+        self.tracer = tracer
+        self.aggregator = aggregator
         self._attr_name = f"{device.name} {self.period_type.value} Energy"
         self._attr_unique_id = f"sensor.{device.name.lower()}_{device.id}_{self.period_type.value.lower()}_energy"
         self._attr_should_poll = False
@@ -39,13 +56,23 @@ class MirAIeEnergySensor(SensorEntity, ABC):
         self._attr_suggested_unit_of_measurement = UnitOfEnergy.KILO_WATT_HOUR
         self._attr_suggested_display_precision = 2
         self._attr_native_value = None
+        # First day of the period the native value was fetched for
+        self._period_start: date | None = None
+
+    @property
+    def extra_state_attributes(self) -> dict[str, str] | None:
+        """Return the period the consumption belongs to."""
+        if self._period_start is None:
+            return None
+        return {ATTR_PERIOD_START: self._period_start.isoformat()}
 
     async def async_update(self):
         """Update the sensor state with the latest energy consumption data."""
         now = datetime.now().astimezone()
         cutoff_time = now.replace(hour=CUTOFF_HOUR, minute=0, second=0, microsecond=0)
         if not self.hub.http or self.hub.http.closed:
-            self.hub.http = aiohttp.ClientSession()
+            self.hub.http = self.tracer.client_session()
+        period_start = self.period_start()
         consumption = await self.get_energy_consumption()
 
         """Consumption figures are updated on the server some time between 7-10 am the next day.
@@ -59,22 +86,90 @@ class MirAIeEnergySensor(SensorEntity, ABC):
         await self._set_last_reset_time()
         self._attr_native_value = consumption
 
+        if consumption is None:
+            # Past the cutoff the device no longer counts towards the totals
+            self._period_start = None
+            self.aggregator.async_remove_device(self.device.id, self.period_type)
+        else:
+            self._period_start = period_start
+            self._async_update_aggregator(float(consumption))
+
+    async def async_added_to_hass(self):
+        """Restore the last known consumption and reset time."""
+        await super().async_added_to_hass()
+        if (last_sensor_data := await self.async_get_last_sensor_data()) is not None:
+            self._attr_native_value = last_sensor_data.native_value
+        if (last_state := await self.async_get_last_state()) is not None:
+            if last_reset := last_state.attributes.get("last_reset"):
+                self._attr_last_reset = dt_util.parse_datetime(last_reset)
+            if period_start := last_state.attributes.get(ATTR_PERIOD_START):
+                self._period_start = date.fromisoformat(period_start)
+
+        # Seed the totals with the restored value while it was fetched for the
+        # current period, so restored aggregates don't drop after a restart
+        if (
+            self._attr_native_value is not None
+            and self._period_start == self.period_start()
+        ):
+            self._async_update_aggregator(
+                float(self._attr_native_value), notify=False
+            )
+
+    @callback
+    def _async_update_aggregator(self, consumption: float, notify: bool = True) -> None:
+        """Feed the consumption of the current period to the totals."""
+        self.aggregator.async_update(
+            self.device.id,
+            self.device_entry.area_id if self.device_entry else None,
+            self.period_type,
+            self._period_start,
+            consumption,
+            notify,
+        )
+
     async def async_will_remove_from_hass(self):
         """Entity being removed from hass."""
-        LOGGER.debug(f"Removing energy consumption entity ({self._attr_name}) from HA")
-        if self.hub.http and not self.hub.http.closed:
-            await self.hub.http.close()
+        LOGGER.debug("Removing energy consumption entity (%s) from HA", self._attr_name)
         return await super().async_will_remove_from_hass()
 
+    @abstractmethod
+    def period_start(self) -> date:
+        """Return the first day of the period the latest data belongs to."""
+        raise NotImplementedError
+
     @abstractmethod
     async def get_energy_consumption(self) -> float | None:
         """Fetch the latest power consumption data."""
         raise NotImplementedError
 
+    async def _fetch_energy_consumption(self, date_string: str) -> float | None:
+        """Fetch the energy consumption of the period starting at date_string."""
+        LOGGER.debug(
+            "Fetching %s energy consumption for device: %s, period: %s",
+            self.period_type.value,
+            self._attr_name,
+            date_string,
+        )
+        consumption = await self.hub.get_energy_consumption(
+            self.device, self.period_type, from_date=date_string
+        )
+        return consumption.get(date_string)
+
     @abstractmethod
+    def _reset_boundary(self, now: datetime) -> datetime:
+        """Return the start of the current reset period."""
+        raise NotImplementedError
+
+    def _is_current_period(self) -> bool:
+        """Return True if the sensor was reset within the current period."""
+        now = datetime.now(timezone.utc).astimezone()
+        last_reset = getattr(self, "_attr_last_reset", None)
+        return last_reset is not None and last_reset >= self._reset_boundary(now)
+
     async def _set_last_reset_time(self):
         """Set the last reset time for the sensor entity."""
-        raise NotImplementedError
+        if not self._is_current_period():
+            self._attr_last_reset = datetime.now(timezone.utc).astimezone()
 
     @property
     def device_info(self) -> DeviceInfo:
@@ -95,76 +190,189 @@ class MirAIeDailyEnergySensor(MirAIeEnergySensor):
     def period_type(self) -> ConsumptionPeriodType:
         return ConsumptionPeriodType.DAILY
 
+    def period_start(self) -> date:
+        """Return yesterday, the latest day with consumption data."""
+        return datetime.today().date() - timedelta(days=1)
+
     async def get_energy_consumption(self) -> float | None:
         """Fetch the latest daily energy consumption data."""
-        yesterday = datetime.today().date() - timedelta(days=1)
-        date_string = yesterday.strftime("%d%m%Y")
-        LOGGER.debug(f"Fetching {self.period_type.value} energy consumption for device: {self._attr_name}, period: {date_string}")
-        consumption = await self.hub.get_energy_consumption(self.device, self.period_type, from_date=date_string)
-        return consumption.get(date_string)
+        date_string = self.period_start().strftime("%d%m%Y")
+        return await self._fetch_energy_consumption(date_string)
 
-    async def _set_last_reset_time(self):
-        """Set the last reset time for the daily energy sensor entity."""
-        now = datetime.now(timezone.utc).astimezone()
-        start_of_today = now.replace(hour=0, minute=0, second=0, microsecond=0)
-        if not getattr(self, "_attr_last_reset", None) or self._attr_last_reset < start_of_today:
-            self._attr_last_reset = now
+    def _reset_boundary(self, now: datetime) -> datetime:
+        """Return the start of today."""
+        return now.replace(hour=0, minute=0, second=0, microsecond=0)
 
 class MirAIeWeeklyEnergySensor(MirAIeEnergySensor):
     @property
     def period_type(self) -> ConsumptionPeriodType:
         return ConsumptionPeriodType.WEEKLY
 
+    def period_start(self) -> date:
+        """Return the sunday the latest week with consumption data starts."""
+        return get_last_sunday()
+
     async def get_energy_consumption(self) -> float | None:
         """Fetch the latest weekly energy consumption data."""
-        date_string = get_last_sunday().strftime("%d%m%Y")
-        LOGGER.debug(f"Fetching {self.period_type.value} energy consumption for device: {self._attr_name}, period: {date_string}")
-        consumption = await self.hub.get_energy_consumption(self.device, self.period_type, from_date=date_string)
-        return consumption.get(date_string)
+        date_string = self.period_start().strftime("%d%m%Y")
+        return await self._fetch_energy_consumption(date_string)
 
-    async def _set_last_reset_time(self):
-        """Set the last reset time for the weekly energy sensor entity."""
-        now = datetime.now(timezone.utc).astimezone()
-        start_of_week = (now - timedelta(days=now.weekday() + 1)).replace(hour=0, minute=0, second=0, microsecond=0)
-        if not getattr(self, "_attr_last_reset", None) or self._attr_last_reset < start_of_week:
-            self._attr_last_reset = now
+    def _reset_boundary(self, now: datetime) -> datetime:
+        """Return the start of the week."""
+        return (now - timedelta(days=now.weekday() + 1)).replace(hour=0, minute=0, second=0, microsecond=0)
 
 class MirAIeMonthlyEnergySensor(MirAIeEnergySensor):
     @property
     def period_type(self) -> ConsumptionPeriodType:
         return ConsumptionPeriodType.MONTHLY
 
+    def period_start(self) -> date:
+        """Return the first day of the month yesterday belongs to."""
+        yesterday = datetime.today().date() - timedelta(days=1)
+        return yesterday.replace(day=1)
+
     async def get_energy_consumption(self) -> float | None:
         """Fetch the latest monthly energy consumption data."""
-        yesterday = datetime.today().date() - timedelta(days=1)
-        date_string = yesterday.strftime("%m%Y")
-        LOGGER.debug(f"Fetching {self.period_type.value} energy consumption for device: {self._attr_name}, period: {date_string}")
-        consumption = await self.hub.get_energy_consumption(self.device, self.period_type, from_date=date_string)
-        return consumption.get(date_string)
+        date_string = self.period_start().strftime("%m%Y")
+        return await self._fetch_energy_consumption(date_string)
 
-    async def _set_last_reset_time(self):
-        """Set the last reset time for the monthly energy sensor entity."""
-        now = datetime.now(timezone.utc).astimezone()
-        start_of_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        if not getattr(self, "_attr_last_reset", None) or self._attr_last_reset < start_of_month:
-            self._attr_last_reset = now
+    def _reset_boundary(self, now: datetime) -> datetime:
+        """Return the start of the month."""
+        return now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+class MirAIeAggregateEnergySensor(RestoreSensor):
+    """Sensor for the summed consumption of the account or of an area."""
+
+    def __init__(
+        self,
+        entry: ConfigEntry,
+        aggregator: MirAIeEnergyAggregator,
+        period_type: ConsumptionPeriodType,
+        area_id: str | None = ACCOUNT,
+        area_name: str | None = None,
+    ):
+        """Initialize the sensor."""
+        self.aggregator = aggregator
+        self.period_type = period_type
+        self.area_id = area_id
+        group_name = "MirAIe" if area_id is ACCOUNT else f"MirAIe {area_name or area_id}"
+        self._attr_name = f"{group_name} {period_type.value} Energy"
+        self._attr_unique_id = f"{entry.entry_id}_{area_id or 'account'}_{period_type.value.lower()}_energy"
+        self._attr_should_poll = False
+        self._attr_device_class = SensorDeviceClass.ENERGY
+        self._attr_state_class = SensorStateClass.TOTAL
+        self._attr_native_unit_of_measurement = UnitOfEnergy.KILO_WATT_HOUR
+        self._attr_suggested_unit_of_measurement = UnitOfEnergy.KILO_WATT_HOUR
+        self._attr_suggested_display_precision = 2
+        self._attr_native_value = None
+
+    async def async_added_to_hass(self):
+        """Restore the last total and follow the running total from then on."""
+        await super().async_added_to_hass()
+        if (last_sensor_data := await self.async_get_last_sensor_data()) is not None:
+            self._attr_native_value = last_sensor_data.native_value
+        if (last_state := await self.async_get_last_state()) is not None and (
+            last_reset := last_state.attributes.get("last_reset")
+        ):
+            self._attr_last_reset = dt_util.parse_datetime(last_reset)
+
+        self.async_on_remove(
+            self.aggregator.async_add_listener(
+                self.area_id, self.period_type, self._async_handle_update
+            )
+        )
+        # A restored total is kept until live values arrive
+        if (
+            self._attr_native_value is None
+            and self.aggregator.get(self.area_id, self.period_type) is not None
+        ):
+            self._async_handle_update()
+
+    @callback
+    def _async_handle_update(self) -> None:
+        """Write the current running total to HA."""
+        total = self.aggregator.get(self.area_id, self.period_type)
+        self._attr_native_value = round(total.total, 3)
+        self._attr_last_reset = dt_util.start_of_local_day(total.period_start)
+        self.async_write_ha_state()
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback):
     """Set up MirAIe energy sensors from a config entry."""
-    hub: MirAIeHub = hass.data[DOMAIN][entry.entry_id]
-    sensors = []
-    for device in hub.home.devices:
-        sensors += [
-            MirAIeDailyEnergySensor(hub, device),
-            MirAIeWeeklyEnergySensor(hub, device),
-            MirAIeMonthlyEnergySensor(hub, device),
+    data: MirAIeData = hass.data[DOMAIN][entry.entry_id]
+    hub: MirAIeHub = data.hub
+    sensors: list[MirAIeEnergySensor] = []
+
+    def create_sensors(devices: list[MirAIeDevice]) -> list[MirAIeEnergySensor]:
+        new_sensors = []
+        for device in devices:
+            new_sensors += [
+                MirAIeDailyEnergySensor(hub, device, data.tracer, data.energy),
+                MirAIeWeeklyEnergySensor(hub, device, data.tracer, data.energy),
+                MirAIeMonthlyEnergySensor(hub, device, data.tracer, data.energy),
+            ]
+        sensors.extend(new_sensors)
+        return new_sensors
+
+    def create_aggregate_sensors(area_id: str | None) -> list[MirAIeAggregateEnergySensor]:
+        area_name = None
+        if area_id is not ACCOUNT:
+            data.energy.async_add_area(area_id)
+            if area := ar.async_get(hass).async_get_area(area_id):
+                area_name = area.name
+        return [
+            MirAIeAggregateEnergySensor(entry, data.energy, period_type, area_id, area_name)
+            for period_type in (
+                ConsumptionPeriodType.DAILY,
+                ConsumptionPeriodType.WEEKLY,
+                ConsumptionPeriodType.MONTHLY,
+            )
         ]
-    async_add_entities(sensors, update_before_add=True)  # Register sensors
+
+    device_registry = dr.async_get(hass)
+    area_ids = {
+        device_entry.area_id
+        for device in hub.home.devices
+        if (device_entry := device_registry.async_get_device(identifiers={(DOMAIN, device.id)}))
+        and device_entry.area_id
+    }
+    aggregate_sensors = create_aggregate_sensors(ACCOUNT)
+    for area_id in area_ids:
+        aggregate_sensors += create_aggregate_sensors(area_id)
+
+    # Sensors start from their restored state, the first fetch is left to the scheduler
+    async_add_entities(create_sensors(hub.home.devices) + aggregate_sensors)  # Register sensors
+
+    @callback
+    def async_add_area(area_id: str) -> None:
+        async_add_entities(create_aggregate_sensors(area_id))
+
+    entry.async_on_unload(data.energy.async_add_area_listener(async_add_area))
+
+    @callback
+    def async_add_devices(devices: list[MirAIeDevice]) -> None:
+        async_add_entities(create_sensors(devices))
+
+    entry.async_on_unload(
+        async_dispatcher_connect(
+            hass, SIGNAL_DEVICES_ADDED.format(entry.entry_id), async_add_devices
+        )
+    )
 
     async def update_sensors(now=None):
+        # Drop the sensors and totals of devices that have since left the home
+        for sensor in sensors:
+            if sensor.device not in hub.home.devices:
+                data.energy.async_remove_device(sensor.device.id)
+        sensors[:] = [sensor for sensor in sensors if sensor.device in hub.home.devices]
         for sensor in sensors:
+            if sensor.hass is None:
+                continue  # Not added to HA yet
             await sensor.async_update()
             sensor.async_write_ha_state()  # Ensure HA is notified of new data
 
-    async_track_time_interval(hass, update_sensors, timedelta(minutes=30))
+    entry.async_on_unload(async_call_later(hass, FIRST_UPDATE_DELAY, update_sensors))
+    entry.async_on_unload(
+        async_track_time_interval(hass, update_sensors, UPDATE_INTERVAL)
+    )
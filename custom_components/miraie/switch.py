@@ -12,27 +12,41 @@ from homeassistant.components.switch import (
     SwitchEntity,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from .const import (
     DOMAIN,
+    SIGNAL_DEVICES_ADDED,
 )
 
 from .logger import LOGGER
+from .models import MirAIeData
 
 async def async_setup_entry(
     hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
 ) -> None:
 
     """Set up the MirAIe Climate Hub."""
-    hub: MirAIeHub = hass.data[DOMAIN][entry.entry_id]
+    data: MirAIeData = hass.data[DOMAIN][entry.entry_id]
+    hub: MirAIeHub = data.hub
 
     entities = list(map(MirAIeDisplaySwitch, hub.home.devices))
 
     async_add_entities(entities)
 
+    @callback
+    def async_add_devices(devices: list[MirAIeDevice]) -> None:
+        async_add_entities(list(map(MirAIeDisplaySwitch, devices)))
+
+    entry.async_on_unload(
+        async_dispatcher_connect(
+            hass, SIGNAL_DEVICES_ADDED.format(entry.entry_id), async_add_devices
+        )
+    )
+
 
 class MirAIeDisplaySwitch(SwitchEntity):
     """Representation of a MirAIe Climate."""
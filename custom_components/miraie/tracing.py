@@ -0,0 +1,219 @@
+"""Sampled tracing of the MirAIe MQTT and HTTP traffic."""
+
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import asdict, dataclass
+import random
+import time
+from types import SimpleNamespace
+from typing import Any
+
+import aiohttp
+from aiomqtt import Client, Message
+from miraie_ac import MirAIeBroker, MirAIeHub
+
+from homeassistant.core import callback
+
+from .const import DEFAULT_TRACE_SAMPLE_RATE, TRACE_BUFFER_SIZE
+
+OUTCOME_OK = "ok"
+OUTCOME_ERROR = "error"
+
+
+@dataclass(slots=True)
+class TraceEvent:
+    """A single traced MQTT message or HTTP request."""
+
+    timestamp: float
+    kind: str
+    target: str
+    device_id: str | None
+    size: int | None
+    latency_ms: float | None
+    outcome: str
+
+
+class MirAIeTracer:
+    """Records sampled traffic events into a bounded ring buffer.
+
+    Messages are traced where they enter or leave the broker and the HTTP
+    session, so sizes are the encoded payload lengths. Events hold raw
+    values only and are formatted when exported, so a disabled tracer
+    costs a single attribute check per message.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        sample_rate: float = DEFAULT_TRACE_SAMPLE_RATE,
+        buffer_size: int = TRACE_BUFFER_SIZE,
+    ) -> None:
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self._events: deque[TraceEvent] = deque(maxlen=buffer_size)
+        self._hub: MirAIeHub | None = None
+        self._trace_config = self._build_trace_config()
+
+    def _sampled(self) -> bool:
+        """Return True if the next event should be recorded."""
+        return self.enabled and (
+            self.sample_rate >= 1 or random.random() < self.sample_rate
+        )
+
+    def _append(
+        self,
+        kind: str,
+        target: str,
+        size: int | None,
+        started: float,
+        outcome: str,
+    ) -> TraceEvent:
+        """Record an event that started at the perf_counter value started."""
+        latency_ms = (time.perf_counter() - started) * 1000
+        event = TraceEvent(
+            time.time() - latency_ms / 1000,
+            kind,
+            target,
+            self._device_id(target),
+            size,
+            latency_ms,
+            outcome,
+        )
+        self._events.append(event)
+        return event
+
+    def _device_id(self, target: str) -> str | None:
+        """Return the ID of the device a topic or URL belongs to."""
+        if self._hub is None:
+            return None
+        for device in self._hub.home.devices:
+            if target in (
+                device.control_topic,
+                device.status_topic,
+                device.connection_status_topic,
+            ) or f"/{device.id}" in target:
+                return device.id
+        return None
+
+    @callback
+    def async_attach(self, hub: MirAIeHub, broker: MirAIeBroker) -> None:
+        """Trace the messages the broker receives and publishes."""
+        self._hub = hub
+
+        on_message = broker.on_message
+
+        def traced_on_message(message: Message) -> None:
+            if not self._sampled():
+                on_message(message)
+                return
+
+            started = time.perf_counter()
+            outcome = OUTCOME_ERROR
+            try:
+                on_message(message)
+                outcome = OUTCOME_OK
+            finally:
+                self._append(
+                    "mqtt", message.topic.value, len(message.payload), started, outcome
+                )
+
+        broker.on_message = traced_on_message
+
+        # The client is replaced on every reconnect, right before on_connect
+        on_connect = broker.on_connect
+
+        async def traced_on_connect() -> None:
+            self._wrap_publish(broker.client)
+            await on_connect()
+
+        broker.on_connect = traced_on_connect
+        if (client := getattr(broker, "client", None)) is not None:
+            self._wrap_publish(client)
+
+    def _wrap_publish(self, client: Client) -> None:
+        """Trace the messages published by an MQTT client."""
+        publish = client.publish
+
+        async def traced_publish(topic: str, payload: Any = None, *args, **kwargs):
+            if not self._sampled():
+                return await publish(topic, payload, *args, **kwargs)
+
+            size = len(payload.encode() if isinstance(payload, str) else payload or b"")
+            started = time.perf_counter()
+            outcome = OUTCOME_ERROR
+            try:
+                result = await publish(topic, payload, *args, **kwargs)
+                outcome = OUTCOME_OK
+            finally:
+                self._append("mqtt", topic, size, started, outcome)
+            return result
+
+        client.publish = traced_publish
+
+    def client_session(self) -> aiohttp.ClientSession:
+        """Return an HTTP session whose requests are traced."""
+        return aiohttp.ClientSession(trace_configs=[self._trace_config])
+
+    def _build_trace_config(self) -> aiohttp.TraceConfig:
+        """Return the aiohttp hooks that trace requests and response sizes."""
+
+        async def on_request_start(
+            session: aiohttp.ClientSession,
+            context: SimpleNamespace,
+            params: aiohttp.TraceRequestStartParams,
+        ) -> None:
+            context.started = time.perf_counter() if self._sampled() else None
+            context.event = None
+
+        async def on_request_end(
+            session: aiohttp.ClientSession,
+            context: SimpleNamespace,
+            params: aiohttp.TraceRequestEndParams,
+        ) -> None:
+            if context.started is not None:
+                # The body is counted as its chunks arrive
+                context.event = self._append(
+                    "http",
+                    str(params.url.with_query(None)),
+                    0,
+                    context.started,
+                    OUTCOME_OK if params.response.status < 400 else OUTCOME_ERROR,
+                )
+
+        async def on_request_exception(
+            session: aiohttp.ClientSession,
+            context: SimpleNamespace,
+            params: aiohttp.TraceRequestExceptionParams,
+        ) -> None:
+            if context.started is not None:
+                self._append(
+                    "http",
+                    str(params.url.with_query(None)),
+                    None,
+                    context.started,
+                    OUTCOME_ERROR,
+                )
+
+        async def on_response_chunk_received(
+            session: aiohttp.ClientSession,
+            context: SimpleNamespace,
+            params: aiohttp.TraceResponseChunkReceivedParams,
+        ) -> None:
+            if (event := getattr(context, "event", None)) is not None:
+                event.size += len(params.chunk)
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_request_end.append(on_request_end)
+        trace_config.on_request_exception.append(on_request_exception)
+        trace_config.on_response_chunk_received.append(on_response_chunk_received)
+        return trace_config
+
+    def as_diagnostics(self) -> dict[str, Any]:
+        """Return the tracer settings and recorded events for diagnostics."""
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "events": [asdict(event) for event in self._events],
+        }